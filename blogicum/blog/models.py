@@ -1,5 +1,8 @@
 from django.db import models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 
 
 User = get_user_model()
@@ -56,6 +59,38 @@ class Location(BaseModel):
         return self.name
 
 
+class PublishedPostQuerySet(models.QuerySet):
+    """QuerySet постов с выборкой опубликованных записей."""
+
+    def published(self):
+        return self.filter(
+            is_published=True,
+            pub_date__lte=timezone.now(),
+            category__is_published=True,
+        )
+
+    def with_comment_count(self):
+        """Добавляет к постам поле comment_count.
+
+        Количество комментариев считается коррелированным подзапросом,
+        а не через Count("comment"): агрегат по join'у заставил бы БД
+        группировать по всем колонкам из select_related.
+        """
+        comment_count = (
+            Comment.objects.filter(post=OuterRef("pk"))
+            .order_by()
+            .values("post")
+            .annotate(count=Count("*"))
+            .values("count")
+        )
+        return self.annotate(
+            comment_count=Coalesce(
+                Subquery(comment_count, output_field=IntegerField()),
+                0,
+            ),
+        )
+
+
 class Post(BaseModel):
     """Модель поста."""
 
@@ -96,8 +131,20 @@ class Post(BaseModel):
         verbose_name="Категория",
     )
 
+    objects = PublishedPostQuerySet.as_manager()
+
     class Meta:
         ordering = ("-pub_date",)
+        indexes = (
+            models.Index(
+                fields=("author", "-pub_date"),
+                name="post_author_pubdate_idx",
+            ),
+            models.Index(
+                fields=("category", "is_published", "-pub_date"),
+                name="post_category_pubdate_idx",
+            ),
+        )
         verbose_name = "публикация"
         verbose_name_plural = "Публикации"
 
@@ -1,5 +1,8 @@
+from math import ceil
+
 from django.contrib.auth.decorators import login_required
-from django.db.models import Count
+from django.core.paginator import Paginator
+from django.db.models import Q
 from django.http import Http404
 from django.shortcuts import get_object_or_404, redirect, render
 from django.contrib.auth import get_user_model
@@ -14,6 +17,32 @@ User = get_user_model()
 
 PAGE_PAGINATOR = 10
 
+# Поля пользователя, которые выводятся на странице профиля.
+PROFILE_FIELDS = (
+    "id",
+    "username",
+    "first_name",
+    "last_name",
+    "date_joined",
+    "is_staff",
+)
+
+# Поля, которые выводятся в карточке поста (includes/post_card.html).
+LIST_FIELDS = (
+    "id",
+    "title",
+    "text",
+    "pub_date",
+    "image",
+    "is_published",
+    "author__username",
+    "category__title",
+    "category__slug",
+    "category__is_published",
+    "location__name",
+    "location__is_published",
+)
+
 
 class HomePage(ListView):
     """Представление для главной страницы."""
@@ -24,26 +53,22 @@ class HomePage(ListView):
 
     def get_queryset(self):
         return (
-            Post.objects.filter(
-                is_published=True,
-                pub_date__lte=timezone.now(),
-                category__is_published=True,
+            Post.objects.published()
+            .select_related(
+                "author",
+                "category",
+                "location",
             )
+            .only(*LIST_FIELDS)
             .order_by(
                 "-pub_date",
             )
-            .annotate(
-                comment_count=Count("comment"),
-            )
+            .with_comment_count()
         )
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context["total_posts"] = Post.objects.filter(
-            is_published=True,
-            pub_date__lte=timezone.now(),
-            category__is_published=True,
-        ).count()
+        context["total_posts"] = context["paginator"].count
         return context
 
 
@@ -54,23 +79,17 @@ class CategoryListView(ListView):
     paginate_by = PAGE_PAGINATOR
 
     def get_queryset(self):
-        category = self.get_category()
-        if not category.is_published:
-            slug = self.kwargs["category_slug"]
-            raise Http404(
-                f"Категория с slug {slug} не опубликована",
-            )
-
         return (
-            category.post.filter(
-                is_published=True, pub_date__lte=timezone.now()
+            self.get_category().post.published()
+            .select_related(
+                "author",
+                "location",
             )
+            .only(*LIST_FIELDS)
             .order_by(
                 "-pub_date",
             )
-            .annotate(
-                comment_count=Count("comment"),
-            )
+            .with_comment_count()
         )
 
     def get_context_data(self, **kwargs):
@@ -79,8 +98,14 @@ class CategoryListView(ListView):
         return context
 
     def get_category(self):
-        slug = self.kwargs["category_slug"]
-        return get_object_or_404(Category, slug=slug)
+        if not hasattr(self, "_category"):
+            slug = self.kwargs["category_slug"]
+            self._category = get_object_or_404(
+                Category,
+                slug=slug,
+                is_published=True,
+            )
+        return self._category
 
 
 class ProfileListView(ListView):
@@ -90,17 +115,17 @@ class ProfileListView(ListView):
     paginate_by = PAGE_PAGINATOR
 
     def get_queryset(self):
-        profile = self.get_profile()
         return (
-            Post.objects.filter(
-                author=profile,
+            self.get_profile().post
+            .select_related(
+                "category",
+                "location",
             )
+            .only(*LIST_FIELDS)
             .order_by(
                 "-pub_date",
             )
-            .annotate(
-                comment_count=Count("comment"),
-            )
+            .with_comment_count()
         )
 
     def get_context_data(self, **kwargs):
@@ -109,8 +134,13 @@ class ProfileListView(ListView):
         return context
 
     def get_profile(self):
-        username = self.kwargs["username"]
-        return get_object_or_404(User, username=username)
+        if not hasattr(self, "_profile"):
+            username = self.kwargs["username"]
+            self._profile = get_object_or_404(
+                User.objects.only(*PROFILE_FIELDS),
+                username=username,
+            )
+        return self._profile
 
 
 @login_required(login_url="/auth/login/")
@@ -121,7 +151,9 @@ def edit_profile(request):
     if request.method == "POST":
         form = ProfileEditForm(request.POST, instance=profile)
         if form.is_valid():
-            form.save()
+            if form.changed_data:
+                profile = form.save(commit=False)
+                profile.save(update_fields=form.changed_data)
             return redirect("blog:profile", profile.username)
     else:
         form = ProfileEditForm(instance=profile)
@@ -136,27 +168,48 @@ def edit_profile(request):
 def post_detail(request, post_id):
     """Представление для детального отображения поста."""
     current_post = get_object_or_404(
-        Post,
+        Post.objects.select_related(
+            "author",
+            "category",
+            "location",
+        ),
         pk=post_id,
     )
 
-    if request.user != current_post.author:
-        current_post = get_object_or_404(
-            Post,
-            pk=post_id,
-            is_published=True,
-            pub_date__lte=timezone.now(),
-            category__is_published=True,
+    if request.user != current_post.author and (
+        not current_post.is_published
+        or current_post.pub_date > timezone.now()
+        or current_post.category is None
+        or not current_post.category.is_published
+    ):
+        raise Http404(f"Публикация с id {post_id} не найдена")
+
+    comments = (
+        current_post.comment
+        .select_related(
+            "author",
         )
-
-    comments = Comment.objects.filter(post=current_post)
+        .only(
+            "id",
+            "text",
+            "created_at",
+            "post",
+            "author__username",
+        )
+        .order_by(
+            "created_at",
+            "pk",
+        )
+    )
+    paginator = Paginator(comments, PAGE_PAGINATOR)
+    page_obj = paginator.get_page(request.GET.get("page"))
 
     form = CommentForm()
 
     context = {
         "post": current_post,
         "form": form,
-        "comments": comments,
+        "page_obj": page_obj,
     }
     return render(request, "blog/detail.html", context)
 
@@ -167,23 +220,25 @@ def create_post(request, pk_post=None):
     user = request.user
 
     if pk_post:
-        instance = get_object_or_404(Post, id=pk_post)
-        if user != instance.author:
+        instance = get_object_or_404(Post, pk=pk_post)
+        if instance.author_id != user.id:
             return redirect("blog:post_detail", instance.pk)
     else:
         instance = None
 
-    form = PostForm(
-        request.POST or None,
-        request.FILES or None,
-        instance=instance,
-    )
-
-    if form.is_valid():
-        new_post = form.save(commit=False)
-        new_post.author = user
-        new_post.save()
-        return redirect("blog:profile", user.username)
+    if request.method == "POST":
+        form = PostForm(
+            request.POST,
+            request.FILES,
+            instance=instance,
+        )
+        if form.is_valid():
+            new_post = form.save(commit=False)
+            new_post.author = user
+            new_post.save()
+            return redirect("blog:profile", user.username)
+    else:
+        form = PostForm(instance=instance)
 
     context = {"form": form}
     return render(request, "blog/create.html", context)
@@ -195,41 +250,64 @@ def delete_post(request, pk_post):
     user = request.user
     instance = get_object_or_404(Post, pk=pk_post)
 
-    if user != instance.author and not user.is_staff:
+    if instance.author_id != user.id and not user.is_staff:
         return redirect("blog:post_detail", instance.pk)
 
-    form = PostForm(instance=instance)
-    context = {"form": form}
-
     if request.method == "POST":
         instance.delete()
         return redirect("blog:index")
 
+    form = PostForm(instance=instance)
+    context = {"form": form}
     return render(request, "blog/create.html", context)
 
 
+def get_comment_url(comment):
+    """Возвращает адрес страницы поста, на которой выводится комментарий."""
+    position = Comment.objects.filter(
+        Q(created_at__lt=comment.created_at)
+        | Q(created_at=comment.created_at, pk__lte=comment.pk),
+        post_id=comment.post_id,
+    ).count()
+    page = max(ceil(position / PAGE_PAGINATOR), 1)
+    url = reverse("blog:post_detail", args=[comment.post_id])
+    return f"{url}?page={page}#comment_{comment.pk}"
+
+
 @login_required(login_url="/auth/login/")
 def add_comment(request, post_id, comment_id=None):
     """Представление для создания и редактирования комментария."""
     user = request.user
-    post = get_object_or_404(Post, pk=post_id)
 
     if comment_id:
-        comment = get_object_or_404(Comment, pk=comment_id, post=post)
-        if user != comment.author:
+        comment = get_object_or_404(
+            Comment.objects.select_related("post"),
+            pk=comment_id,
+            post_id=post_id,
+        )
+        post = comment.post
+        if user.id != comment.author_id:
             return redirect("blog:post_detail", post_id=post.pk)
     else:
+        post = get_object_or_404(
+            Post.objects.only("id", "author"),
+            pk=post_id,
+        )
         comment = None
 
     form = CommentForm(request.POST or None, instance=comment)
 
     if request.method == "POST":
         if form.is_valid():
-            comment = form.save(commit=False)
-            comment.author = user
-            comment.post = post
-            comment.save()
-            return redirect(reverse("blog:post_detail", args=[post.pk]))
+            if comment is None:
+                comment = form.save(commit=False)
+                comment.author = user
+                comment.post = post
+                comment.save()
+            elif form.changed_data:
+                comment = form.save(commit=False)
+                comment.save(update_fields=form.changed_data)
+            return redirect(get_comment_url(comment))
 
     context = {
         "form": form,
@@ -246,12 +324,12 @@ def delete_comment(request, post_id, comment_id):
     user = request.user
     comment = get_object_or_404(Comment, pk=comment_id)
 
-    if user != comment.author:
+    if comment.author_id != user.id:
         return redirect("blog:post_detail", post_id)
 
     if request.method == "POST":
         comment.delete()
-        return redirect(reverse("blog:post_detail", args=[post_id]))
+        return redirect("blog:post_detail", post_id=post_id)
 
     context = {
         "comment": comment,
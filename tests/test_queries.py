@@ -0,0 +1,189 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from mixer.backend.django import Mixer
+
+from conftest import N_PER_PAGE
+
+pytestmark = [pytest.mark.django_db]
+
+
+def count_page_queries(client, url):
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get(url)
+    assert response.status_code == 200, (
+        f"Убедитесь, что страница `{url}` загружается без ошибок."
+    )
+    return len(ctx.captured_queries)
+
+
+@pytest.fixture
+def post_list_url(request, user, published_category):
+    return {
+        "index": "/",
+        "category": f"/category/{published_category.slug}/",
+        "profile": f"/profile/{user.username}/",
+    }[request.param]
+
+
+@pytest.fixture
+def blend_list_posts(
+        mixer: Mixer, user, published_category, published_locations
+):
+    def blend(n):
+        return mixer.cycle(n).blend(
+            "blog.Post",
+            author=user,
+            category=published_category,
+            location=mixer.sequence(*published_locations),
+        )
+
+    return blend
+
+
+@pytest.mark.parametrize(
+    "post_list_url",
+    ("index", "category", "profile"),
+    indirect=True,
+)
+def test_post_list_queries_do_not_grow(
+        blend_list_posts, client, post_list_url
+):
+    blend_list_posts(1)
+    n_queries_single = count_page_queries(client, post_list_url)
+    blend_list_posts(N_PER_PAGE)
+    n_queries_full = count_page_queries(client, post_list_url)
+    assert n_queries_single == n_queries_full, (
+        "Убедитесь, что количество SQL-запросов при загрузке страницы"
+        f" `{post_list_url}` не зависит от количества публикаций на ней:"
+        " связанные объекты публикаций должны загружаться одним запросом."
+    )
+
+
+@pytest.mark.parametrize(
+    "post_list_url, expected",
+    (("index", 2), ("category", 3), ("profile", 3)),
+    indirect=("post_list_url",),
+)
+def test_post_list_num_queries(
+        blend_list_posts, client, django_assert_num_queries,
+        post_list_url, expected
+):
+    blend_list_posts(N_PER_PAGE)
+    with django_assert_num_queries(expected):
+        client.get(post_list_url)
+
+
+def test_post_detail_queries_do_not_grow(
+        mixer: Mixer, post_with_published_location, client
+):
+    url = f"/posts/{post_with_published_location.id}/"
+    mixer.blend(
+        "blog.Comment",
+        post=post_with_published_location,
+        author=mixer.blend("auth.User"),
+    )
+    n_queries_single = count_page_queries(client, url)
+    mixer.cycle(N_PER_PAGE).blend(
+        "blog.Comment",
+        post=post_with_published_location,
+        author=mixer.blend("auth.User"),
+    )
+    n_queries_full = count_page_queries(client, url)
+    assert n_queries_single == n_queries_full == 3, (
+        f"Убедитесь, что страница публикации `{url}` загружает публикацию"
+        " и страницу комментариев к ней вместе с авторами, не выполняя"
+        " отдельный SQL-запрос для каждого комментария."
+    )
+
+
+def test_post_list_comment_count(
+        mixer: Mixer, post_with_published_location, client
+):
+    mixer.cycle(3).blend("blog.Comment", post=post_with_published_location)
+    response = client.get("/")
+    post, = response.context["page_obj"]
+    assert post.comment_count == 3, (
+        "Убедитесь, что на главной странице для каждой публикации"
+        " правильно подсчитывается количество комментариев."
+    )
+    response = client.get(f"/posts/{post_with_published_location.id}/")
+    assert response.context["page_obj"].paginator.count == 3, (
+        "Убедитесь, что на странице публикации правильно подсчитывается"
+        " количество комментариев."
+    )
+
+
+def test_edit_comment_updates_changed_fields_only(
+        mixer: Mixer, user, user_client, post_with_published_location
+):
+    comment = mixer.blend(
+        "blog.Comment", post=post_with_published_location, author=user
+    )
+    url = (
+        f"/posts/{post_with_published_location.id}"
+        f"/edit_comment/{comment.id}/"
+    )
+    with CaptureQueriesContext(connection) as ctx:
+        user_client.post(url, data={"text": "Новый текст"})
+    updates = [
+        query["sql"] for query in ctx.captured_queries
+        if query["sql"].startswith('UPDATE "blog_comment"')
+    ]
+    assert len(updates) == 1 and "author_id" not in updates[0], (
+        "Убедитесь, что при редактировании комментария обновляются"
+        " только изменённые поля."
+    )
+    comment.refresh_from_db()
+    assert comment.text == "Новый текст"
+
+
+def test_add_comment_redirects_to_its_page(
+        mixer: Mixer, user_client, post_with_published_location
+):
+    post_id = post_with_published_location.id
+    mixer.cycle(N_PER_PAGE).blend(
+        "blog.Comment", post=post_with_published_location
+    )
+    response = user_client.post(
+        f"/posts/{post_id}/comment/", data={"text": "Новый комментарий"}
+    )
+    comment = post_with_published_location.comment.latest("created_at")
+    assert response.url == (
+        f"/posts/{post_id}/?page=2#comment_{comment.id}"
+    ), (
+        "Убедитесь, что после добавления комментария пользователь"
+        " попадает на страницу, где выводится его комментарий."
+    )
+
+
+def test_delete_missing_post_returns_404(another_user_client):
+    response = another_user_client.get("/posts/1000/delete/")
+    assert response.status_code == 404, (
+        "Убедитесь, что при попытке удалить несуществующую публикацию"
+        " возвращается ошибка 404."
+    )
+
+
+def test_comment_url_with_equal_timestamps(
+        mixer: Mixer, user, user_client, post_with_published_location
+):
+    post_id = post_with_published_location.id
+    comments = mixer.cycle(N_PER_PAGE + 1).blend(
+        "blog.Comment", post=post_with_published_location, author=user
+    )
+    post_with_published_location.comment.update(
+        created_at=timezone.now()
+    )
+    last = comments[-1]
+    response = user_client.post(
+        f"/posts/{post_id}/edit_comment/{last.id}/",
+        data={"text": "Новый текст"},
+    )
+    assert response.url == f"/posts/{post_id}/?page=2#comment_{last.id}"
+    response = user_client.get(f"/posts/{post_id}/?page=2")
+    assert [c.id for c in response.context["page_obj"]] == [last.id], (
+        "Убедитесь, что комментарии с одинаковым временем создания"
+        " упорядочиваются однозначно."
+    )